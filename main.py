@@ -1,22 +1,75 @@
+import itertools
+import os
+
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import time
+
+# numba is optional: the overlap kernel below runs fine as plain Python,
+# it is just much faster JIT-compiled
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
 from pulp import (
     LpProblem,
     LpMinimize,
     LpVariable,
     LpStatus,
     lpSum,
+    LpAffineExpression,
     LpBinary,
+    LpContinuous,
+    HiGHS_CMD,
     PULP_CBC_CMD
 )
 
+# Name every constraint row when debugging an infeasible model; the
+# per-block/per-student rows number in the thousands and formatting a
+# name for each is a measurable slice of model-build time
+DEBUG_NAMES = False
+
+def getsolver(warm=False):
+    """
+    Pick the solver backend. Prefer HiGHS when the binary is on PATH
+    (much less file-I/O overhead than the CBC subprocess); otherwise
+    fall back to the CBC build bundled with PuLP.
+
+    With warm=True the solver is told to start from the initial values
+    seeded on the variables by a previous solve.
+    """
+    highs = HiGHS_CMD(msg=False, threads=os.cpu_count(), warmStart=warm)
+    if highs.available():
+        return highs
+    # CBC defaults to a single thread and stock settings; this model's
+    # symmetric binary structure benefits from parallel branch-and-cut
+    return PULP_CBC_CMD(
+        msg=False,
+        threads=os.cpu_count(),
+        presolve=True,
+        cuts=True,
+        gapRel=0.01,           # stop once within 1% of optimal
+        options=["-heuristics", "on"],
+        warmStart=warm,
+    )
+
+# python-calamine parses xlsx much faster than openpyxl; use it if installed
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None  # let pandas pick its default reader
+
 def loaddata(f):
     """
     Reads Excel data with columns:
         'Student Name', 'Day of Week', 'Class Start', 'Class End'
     Time format should match '%H:%M:%S' or '%H:%M' (adjust as needed).
     """
-    df = pd.read_excel(f)
+    df = pd.read_excel(f, engine=EXCEL_ENGINE)
     # Adjust format to match your data
     df['Class Start'] = pd.to_datetime(df['Class Start'], format="%H:%M:%S").dt.time
     df['Class End']   = pd.to_datetime(df['Class End'],   format="%H:%M:%S").dt.time
@@ -30,39 +83,92 @@ def genblocks(days, start="07:30", end="17:30"):
         st  = start time
         et  = end time
     """
-    fmt = "%H:%M"
-    st_time = datetime.strptime(start, fmt).time()
-    en_time = datetime.strptime(end, fmt).time()
+    # Work in minutes-of-day; only build time objects for the output
+    sh, sm = (int(p) for p in start.split(":"))
+    eh, em = (int(p) for p in end.split(":"))
+    start_m = sh*60 + sm
+    end_m = eh*60 + em
 
     blocks = []
     for d in days:
-        cur = datetime.combine(datetime.today(), st_time)
-        fin = datetime.combine(datetime.today(), en_time)
-        i = 0
-        while cur < fin:
-            s = cur.time()
-            e = (cur + timedelta(hours=1)).time()
-            if e > en_time:
-                break
-            blocks.append((d, i, s, e))
-            cur += timedelta(hours=1)
-            i += 1
+        for i, m in enumerate(range(start_m, end_m - 59, 60)):
+            blocks.append((
+                d, i,
+                time(m // 60, m % 60),
+                time((m + 60) // 60, (m + 60) % 60),
+            ))
     return blocks
 
-def freeblk(classes, d, s, e):
+@njit(cache=True)
+def _busy_mask(blk_bounds, cls_bounds):
+    """
+    Tight inner loop of the busy check: given (n_blocks, 2) and
+    (n_classes, 2) int32 arrays of [start_min, end_min), return a bool
+    mask of blocks that overlap any class.
+    """
+    n = blk_bounds.shape[0]
+    mask = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        for j in range(cls_bounds.shape[0]):
+            if (cls_bounds[j, 0] < blk_bounds[i, 1]
+                    and cls_bounds[j, 1] > blk_bounds[i, 0]):
+                mask[i] = True
+                break
+    return mask
+
+def classsigs(stmap):
+    """
+    Per-student class signature: a sorted tuple of
+    (day, start_min, end_min). Computed once and reused for the busy
+    precompute and for grouping interchangeable students.
     """
-    Return True if the student is free in block [s, e) on day d,
-    i.e., no overlap with any (class_start, class_end) for that day.
+    return {
+        s: tuple(sorted(
+            (d, cs.hour*60 + cs.minute, ce.hour*60 + ce.minute)
+            for (d, cs, ce) in classes
+        ))
+        for s, classes in stmap.items()
+    }
+
+def busyblocks(sigs, day_blocks):
     """
-    for (day_of_week, cs, ce) in classes:
-        if day_of_week == d:
-            c1 = datetime.combine(datetime.today(), cs)
-            c2 = datetime.combine(datetime.today(), ce)
-            b1 = datetime.combine(datetime.today(), s)
-            b2 = datetime.combine(datetime.today(), e)
-            if c1 < b2 and c2 > b1:
-                return False
-    return True
+    Precompute the set of (student, day, block_index) the student cannot
+    work, i.e., the block overlaps one of their classes.
+
+    Works on the integer-minute signatures from classsigs; students with
+    the same signature share one conflict computation.
+    """
+    # per day: block indices plus [start_min, end_min) bounds
+    blk_idx = {}
+    blk_arr = {}
+    for d, blocks in day_blocks.items():
+        blk_idx[d] = [i for (i, st, et) in blocks]
+        blk_arr[d] = np.array(
+            [(st.hour*60 + st.minute, et.hour*60 + et.minute)
+             for (i, st, et) in blocks],
+            dtype=np.int32,
+        )
+
+    sig_conflicts = {}  # signature -> [(day, block_index), ...]
+    busy = set()
+    for s, sig in sigs.items():
+        if sig not in sig_conflicts:
+            conflicts = []
+            by_day = {}
+            for (d, cs, ce) in sig:
+                by_day.setdefault(d, []).append((cs, ce))
+            for d, day_classes in by_day.items():
+                if d not in blk_arr:
+                    continue
+                mask = _busy_mask(blk_arr[d],
+                                  np.array(day_classes, dtype=np.int32))
+                for pos, hit in enumerate(mask):
+                    if hit:
+                        conflicts.append((d, blk_idx[d][pos]))
+            sig_conflicts[sig] = conflicts
+        for (d, i) in sig_conflicts[sig]:
+            busy.add((s, d, i))
+    return busy
 
 def build_model(df,
                 minh=6,        # Minimum total blocks (hours) per student
@@ -86,146 +192,181 @@ def build_model(df,
     blks = genblocks(ds)
 
     # student -> list of (Day of Week, Class Start, Class End)
+    # One linear pass over the rows; no per-group DataFrame slicing
+    recs = df[["Student Name", "Day of Week", "Class Start", "Class End"]]
     stmap = {}
-    for s, g in df.groupby("Student Name"):
-        stmap[s] = list(zip(g["Day of Week"], g["Class Start"], g["Class End"]))
+    for s, d, cs, ce in recs.itertuples(index=False, name=None):
+        stmap.setdefault(s, []).append((d, cs, ce))
 
     stus = list(stmap.keys())
     prob = LpProblem("sched", LpMinimize)
 
     # Decision variables
-    x = {}        # x[s,d,i] = 1 if student s works block i on day d
-    y = {}        # y[s,d]   = 1 if student s works at all on day d
-    start2 = {}   # start2[s,d,i] = 1 if s starts a 2-block shift at i on day d
-    start3 = {}   # start3[s,d,i] = 1 if s starts a 3-block shift
-    start4 = {}   # start4[s,d,i] = 1 if s starts a 4-block shift
-    u = {}        # u[d,i]        = 1 if block i on day d is uncovered
+    x = {}        # x[s,d,i]   = 1 if student s works block i on day d
+    y = {}        # y[s,d]     = 1 if student s works at all on day d
+    z = {}        # z[s,d,i,L] = 1 if s works an L-block shift starting at i on day d
+    u = {}        # u[d,i]     = 1 if block i on day d is uncovered
 
     # For grouping blocks by day
     day_blocks = {d: [] for d in ds}
     for (d, i, st, et) in blks:
         day_blocks[d].append((i, st, et))
 
+    # Plain index lists, computed once per day rather than unpacked
+    # inside the per-student loops
+    bidx = {d: [i for (i, st, et) in day_blocks[d]] for d in ds}
+
+    # Class signatures in integer minutes, then the blocks each student
+    # cannot work, both computed once up front
+    student_sig = classsigs(stmap)
+    busy = busyblocks(student_sig, day_blocks)
+
+    # (start, length) shift patterns available to each (student, day)
+    patterns = {}
+
     # Create variables
+    # x[s,d,i] is only created for blocks the student is actually free in;
+    # busy slots are simply absent from x and treated as 0 everywhere.
+    # This keeps CBC from having to presolve away columns pinned to zero.
     for s in stus:
         for d in ds:
             y[(s,d)] = LpVariable(f"y_{s}_{d}", cat=LpBinary)
 
-            # x[s,d,i]
-            for (i, st, et) in day_blocks[d]:
-                x[(s,d,i)] = LpVariable(f"x_{s}_{d}_{i}", cat=LpBinary)
-
-            # startX variables where possible
-            block_indices = [b[0] for b in day_blocks[d]]
-            for (i, st, et) in day_blocks[d]:
-                if (i+1) in block_indices:
-                    start2[(s,d,i)] = LpVariable(f"start2_{s}_{d}_{i}", cat=LpBinary)
-                if (i+2) in block_indices:
-                    start3[(s,d,i)] = LpVariable(f"start3_{s}_{d}_{i}", cat=LpBinary)
-                if (i+3) in block_indices:
-                    start4[(s,d,i)] = LpVariable(f"start4_{s}_{d}_{i}", cat=LpBinary)
+            # x[s,d,i] for free blocks only
+            for i in bidx[d]:
+                if (s,d,i) not in busy:
+                    # continuous is enough: the xlink equalities pin x to
+                    # a sum of binary pattern variables
+                    x[(s,d,i)] = LpVariable(f"x_{s}_{d}_{i}",
+                                            lowBound=0, upBound=1,
+                                            cat=LpContinuous)
+
+            # one z per legal (start, length) shift pattern, i.e. every
+            # linked slot exists (in range and not busy)
+            for i in bidx[d]:
+                for L in (2, 3, 4):
+                    if all((s,d,i+k) in x for k in range(L)):
+                        z[(s,d,i,L)] = LpVariable(f"z_{s}_{d}_{i}_{L}", cat=LpBinary)
+                        patterns.setdefault((s,d), []).append((i, L))
 
     for (d, i, st, et) in blks:
-        u[(d,i)] = LpVariable(f"u_{d}_{i}", cat=LpBinary)
+        # also continuous: minimization drives u to max(0, 1 - sum x),
+        # which is integer whenever x is
+        u[(d,i)] = LpVariable(f"u_{d}_{i}", lowBound=0, upBound=1,
+                              cat=LpContinuous)
 
     # Objective: big penalty for uncovered blocks + small penalty for assigned blocks + day_cost for each day worked
+    # Built as one LpAffineExpression so PuLP doesn't allocate an
+    # intermediate expression copy per lpSum/+.
     big_weight = 1000
-    prob += (
-        big_weight * lpSum(u[(d,i)] for (d,i,_,_) in blks)
-        + lpSum(x[(s,d,i)] for s in stus for (d,i,_,_) in blks)
-        + day_cost * lpSum(y[(s,d)] for s in stus for d in ds)
-    ), "obj"
-
-    # 1) Soft coverage
+    prob += LpAffineExpression(itertools.chain(
+        ((u[(d,i)], big_weight) for (d,i,_,_) in blks),
+        ((v, 1) for v in x.values()),
+        ((y[(s,d)], day_cost) for s in stus for d in ds),
+    )), "obj"
+
+    # 1) Soft coverage and 2) overlap <= maxovl share the same LHS
+    #    (staff assigned to this block), so build it once per block
     for (d, i, st, et) in blks:
-        prob += lpSum(x[(s,d,i)] for s in stus) + u[(d,i)] >= 1, f"cover_{d}_{i}"
-
-    # 2) Overlap <= maxovl
-    for (d, i, st, et) in blks:
-        prob += lpSum(x[(s,d,i)] for s in stus) <= maxovl, f"ovl_{d}_{i}"
+        lhs = LpAffineExpression(
+            (x[(s,d,i)], 1) for s in stus if (s,d,i) in x
+        )
+        prob += lhs + u[(d,i)] >= 1, (f"cover_{d}_{i}" if DEBUG_NAMES else None)
+        prob += lhs <= maxovl, (f"ovl_{d}_{i}" if DEBUG_NAMES else None)
 
     # 3) Weekly min/max per student
+    tot_hrs = {}
     for s in stus:
-        total_hrs = lpSum(x[(s,d,i)] for (d,i,_,_) in blks)
-        prob += total_hrs >= minh, f"minH_{s}"
-        prob += total_hrs <= maxh, f"maxH_{s}"
+        tot_hrs[s] = LpAffineExpression(
+            (x[(s,d,i)], 1) for (d,i,_,_) in blks if (s,d,i) in x
+        )
+        prob += tot_hrs[s] >= minh, f"minH_{s}"
+        prob += tot_hrs[s] <= maxh, f"maxH_{s}"
 
     # 4) Overall average in [avg_low, avg_high]
     N = len(stus)
-    total_all = lpSum(x[(s,d,i)] for s in stus for (d,i,_,_) in blks)
+    total_all = LpAffineExpression((v, 1) for v in x.values())
     prob += total_all >= avg_low * N,  "AvgLow"
     prob += total_all <= avg_high * N, "AvgHigh"
 
-    # 5) Busy check
+    # 5) Symmetry breaking: students with identical class schedules are
+    #    interchangeable, so order their total hours to stop CBC from
+    #    exploring permutations of the same schedule
+    groups = {}
     for s in stus:
-        for d in ds:
-            for (i, st, et) in day_blocks[d]:
-                if not freeblk(stmap[s], d, st, et):
-                    prob += x[(s,d,i)] == 0, f"busy_{s}_{d}_{i}"
-
-    # 6) 2–4 consecutive blocks if y[s,d] = 1
+        groups.setdefault(student_sig[s], []).append(s)
+    for members in groups.values():
+        for s_a, s_b in zip(members, members[1:]):
+            prob += tot_hrs[s_a] >= tot_hrs[s_b], f"sym_{s_a}_{s_b}"
+
+    # 6) 2–4 consecutive blocks if y[s,d] = 1, via shift patterns:
+    #    each (s,d) picks exactly y[s,d] patterns, and x[s,d,i] is pinned
+    #    to the sum of patterns covering block i.
+    #    These are the bulk of the rows, so collect them in a list and
+    #    hand PuLP the whole batch at once; prob += pays a per-row
+    #    name-collision check and variable re-registration we don't need.
+    batch = []
     for s in stus:
         for d in ds:
-            block_indices = [b[0] for b in day_blocks[d]]
-            s2_list = [start2[(s,d,i)] for i in block_indices if (s,d,i) in start2]
-            s3_list = [start3[(s,d,i)] for i in block_indices if (s,d,i) in start3]
-            s4_list = [start4[(s,d,i)] for i in block_indices if (s,d,i) in start4]
-
-            sum_x_day = lpSum(x[(s,d,i)] for i in block_indices)
-
-            # Exactly 0 or 1 total shift
-            prob += (lpSum(s2_list + s3_list + s4_list) == y[(s,d)]), f"shifts_{s}_{d}"
-
-            # sum_x_day = 2*start2 + 3*start3 + 4*start4
-            prob += sum_x_day == (
-                2 * lpSum(s2_list) +
-                3 * lpSum(s3_list) +
-                4 * lpSum(s4_list)
-            ), f"sumx_{s}_{d}"
-
-            # link start2 => x[..i], x[..i+1], etc.
-            for i in block_indices:
-                if (s,d,i) in start2:
-                    prob += x[(s,d,i)]   >= start2[(s,d,i)]
-                    prob += x[(s,d,i+1)] >= start2[(s,d,i)]
-                if (s,d,i) in start3:
-                    prob += x[(s,d,i)]   >= start3[(s,d,i)]
-                    prob += x[(s,d,i+1)] >= start3[(s,d,i)]
-                    prob += x[(s,d,i+2)] >= start3[(s,d,i)]
-                if (s,d,i) in start4:
-                    prob += x[(s,d,i)]   >= start4[(s,d,i)]
-                    prob += x[(s,d,i+1)] >= start4[(s,d,i)]
-                    prob += x[(s,d,i+2)] >= start4[(s,d,i)]
-                    prob += x[(s,d,i+3)] >= start4[(s,d,i)]
+            pats = patterns.get((s,d), [])
+            c = lpSum(z[(s,d,i,L)] for (i, L) in pats) == y[(s,d)]
+            batch.append((f"shifts_{s}_{d}", c) if DEBUG_NAMES else c)
+
+            for bi in bidx[d]:
+                if (s,d,bi) in x:
+                    c = x[(s,d,bi)] == lpSum(
+                        z[(s,d,i,L)] for (i, L) in pats if i <= bi < i + L
+                    )
+                    batch.append((f"xlink_{s}_{d}_{bi}", c) if DEBUG_NAMES else c)
+    prob.extend(batch)
 
     return prob, x, y, u, blks, stus
 
-def solve_and_extract(prob, x, y, u, blks, stus):
+def solve_and_extract(prob, x, y, u, blks, stus, warm=False):
     """
     Solve the model and return two DataFrames:
       - sol_df: assigned blocks
       - uncovered_df: blocks marked uncovered
+
+    Pass warm=True when re-solving after a parameter tweak; the last
+    solution is then handed to the solver as a MIP start instead of
+    searching from scratch.
     """
-    solver = PULP_CBC_CMD(msg=False)
+    solver = getsolver(warm)
     prob.solve(solver)
 
     print("Status:", LpStatus[prob.status])
     if LpStatus[prob.status] not in ['Optimal', 'Feasible']:
         return None
 
-    # Build a DataFrame of assigned blocks
-    rows = []
-    for s in stus:
-        for (d, i, st, et) in blks:
-            if x[(s,d,i)].varValue == 1:
-                rows.append({
-                    "Student": s,
-                    "Day": d,
-                    "BlockIdx": i,
-                    "Start": st.strftime("%H:%M"),
-                    "End": et.strftime("%H:%M")
-                })
-    sol_df = pd.DataFrame(rows)
+    # Seed the solution back onto the variables so the next solve of a
+    # tweaked model can warm-start from it
+    for v in prob.variables():
+        v.setInitialValue(v.varValue)
+
+    # (day, i) -> (start, end) for O(1) lookups below
+    block_info = {(d, i): (st, et) for (d, i, st, et) in blks}
+
+    # Build a DataFrame of assigned blocks; x only holds variables for
+    # free blocks, so iterating it skips busy cells entirely.
+    # Columns are built as parallel lists so pandas skips the
+    # row-dict -> column inference path.
+    students, days, idxs, starts, ends = [], [], [], [], []
+    for (s, d, i), v in x.items():
+        if v.varValue == 1:
+            st, et = block_info[(d, i)]
+            students.append(s)
+            days.append(d)
+            idxs.append(i)
+            starts.append(st.strftime("%H:%M"))
+            ends.append(et.strftime("%H:%M"))
+    sol_df = pd.DataFrame({
+        "Student": students,
+        "Day": days,
+        "BlockIdx": idxs,
+        "Start": starts,
+        "End": ends,
+    })
 
     if not sol_df.empty:
         # Each block is effectively 1 hour
@@ -234,24 +375,30 @@ def solve_and_extract(prob, x, y, u, blks, stus):
     else:
         sol_df["TotalHrs"] = 0
 
-    # Sort nicely
-    daymap = {"Monday":1, "Tuesday":2, "Wednesday":3, "Thursday":4, "Friday":5}
-    sol_df["daynum"] = sol_df["Day"].map(daymap)
-    sol_df.sort_values(["daynum","BlockIdx","Student"], inplace=True)
-    sol_df.drop(columns=["daynum"], inplace=True)
+    # Sort nicely: an ordered Categorical sorts days in week order
+    # without a helper column
+    sol_df["Day"] = pd.Categorical(
+        sol_df["Day"],
+        categories=["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"],
+        ordered=True,
+    )
+    sol_df.sort_values(["Day", "BlockIdx", "Student"], inplace=True)
 
     # Identify uncovered
-    uncovered_rows = []
+    u_days, u_idxs, u_starts, u_ends = [], [], [], []
     for (d, i, st, et) in blks:
         if u[(d,i)].varValue == 1:
-            uncovered_rows.append({
-                "Day": d,
-                "BlockIdx": i,
-                "Start": st.strftime("%H:%M"),
-                "End": et.strftime("%H:%M"),
-                "Status": "Uncovered"
-            })
-    uncovered_df = pd.DataFrame(uncovered_rows)
+            u_days.append(d)
+            u_idxs.append(i)
+            u_starts.append(st.strftime("%H:%M"))
+            u_ends.append(et.strftime("%H:%M"))
+    uncovered_df = pd.DataFrame({
+        "Day": u_days,
+        "BlockIdx": u_idxs,
+        "Start": u_starts,
+        "End": u_ends,
+        "Status": ["Uncovered"] * len(u_days),
+    })
 
     return sol_df, uncovered_df
 
@@ -1,7 +1,17 @@
 #!/usr/bin/env python3
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
 import pandas as pd
 
+# python-calamine parses xlsx much faster than openpyxl; use it if installed
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None  # let pandas pick its default reader
+
 def merge(folder, out="merged.xlsx"):
     files = []
     for f in os.listdir(folder):
@@ -13,11 +23,12 @@ def merge(folder, out="merged.xlsx"):
         print("No .xlsx files found in", folder)
         return
 
-    dfs = []
+    # Each read is independent and CPU-bound on xlsx parsing, so fan
+    # them out across processes; ex.map keeps the file order
     for f in files:
         print("Reading:", f)
-        df = pd.read_excel(f)
-        dfs.append(df)
+    with ProcessPoolExecutor() as ex:
+        dfs = list(ex.map(partial(pd.read_excel, engine=EXCEL_ENGINE), files))
 
     merged = pd.concat(dfs, ignore_index=True)
     merged.to_excel(out, index=False)